@@ -1,94 +1,180 @@
 import fitz  # PyMuPDF
 import json
 import os
-from collections import Counter, defaultdict
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import heapq
+from itertools import groupby, repeat
+from operator import itemgetter
 from typing import List, Dict, Tuple, Optional
 import re
 
+try:
+    import orjson  # Optional: faster JSON serialization
+except ImportError:
+    orjson = None
+
+# Precompiled patterns shared by the filtering pipeline.
+_DIGIT_RE = re.compile(r'\d+')
+
+_FOOTER_UNION = re.compile('|'.join(f'(?:{p})' for p in (
+    r'page \d+',
+    r'\d+ of \d+',
+    r'©',
+    r'copyright',
+    r'version \d+',
+    r'\d{4}',
+)))
+
+# Every header/footer pattern except the dots-only one needs a digit, so
+# digit-free text is checked against _DOTS_ONLY_RE alone.
+_HEADER_FOOTER_UNION = re.compile('|'.join(f'(?:{p})' for p in (
+    r'page \d+',
+    r'\d+ of \d+',
+    r'chapter \d+',
+    r'section \d+',
+    r'©.*\d{4}',
+    r'copyright.*\d{4}',
+    r'version \d+',
+)))
+_DOTS_ONLY_RE = re.compile(r'^[.\s]+$')
+
+_SUSPICIOUS_PATS = (
+    (r'^[a-zA-Z]\s[a-zA-Z]\s[a-zA-Z]', "Single letters with spaces"),
+    (r'^\s*[^\w\s]*\s*$', "Only special characters"),
+    (r'^.{1,2}$', "Very short text (1-2 characters)"),
+    (r'^[A-Z]{2,}\s*$', "All caps short text"),
+    (r'^\d+\s*$', "Numbers only"),
+)
+# One named group per pattern; match.lastgroup identifies the description
+_SUSPICIOUS_UNION = re.compile('|'.join(f'(?P<s{i}>{p})' for i, (p, _) in enumerate(_SUSPICIOUS_PATS)))
+_SUSPICIOUS_DESCS = {f's{i}': desc for i, (_, desc) in enumerate(_SUSPICIOUS_PATS)}
+
+_SKIP_PATS = [re.compile(p) for p in (
+    r'^\d+$',
+    r'^[.\s]+$',
+    r'www\.',
+    r'http',
+    r'@',
+    r'^[^a-zA-Z]*$',  # Only non-alphabetic characters
+    r'^\w{1,2}$',     # Very short words
+    r'^[A-Z]\s*$',    # Single capital letter
+)]
+
+@lru_cache(maxsize=8192)
+def _normalize_text(text: str) -> str:
+    return ' '.join(text.split())
+
+@lru_cache(maxsize=8192)
+def _likely_heading_text(text: str) -> bool:
+    """Text-only heading heuristics for stripped text; header/footer checks are left to the caller."""
+    if len(text) < 3 or len(text) > 150 or text.count('.') > 10:
+        return False
+    
+    # Enhanced skip patterns
+    text_lower = text.lower()
+    for pattern in _SKIP_PATS:
+        if pattern.search(text_lower):
+            return False
+    return True
+
+class Span:
+    """A text span with its layout metadata; slotted to keep per-span memory low."""
+    __slots__ = ('text', 'font_size', 'page', 'bbox', 'font', 'flags', 'color', 'page_height',
+                 'original_order', 'rejection_reason')
+    
+    def __init__(self, text: str, font_size: float, page: int, bbox: Tuple, font: str,
+                 flags: int, color: float, page_height: float):
+        self.text = text
+        self.font_size = font_size
+        self.page = page
+        self.bbox = bbox
+        self.font = font
+        self.flags = flags
+        self.color = color
+        self.page_height = page_height
+        self.original_order = 0
+        self.rejection_reason = ""
+    
+    def copy(self) -> 'Span':
+        clone = Span.__new__(Span)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+# Documents with fewer pages are extracted serially: spawning a worker and
+# re-opening the PDF costs roughly as much as extracting a handful of pages
+PARALLEL_MIN_PAGES = 64
+# Pages per worker task; also bounds the pool so no worker sits idle
+PAGE_CHUNK_SIZE = 16
+
 class HeaderFooterDetector:
     """Detects and filters out headers and footers that repeat across pages."""
     
     def __init__(self):
-        self.potential_headers = defaultdict(list)
-        self.potential_footers = defaultdict(list)
+        # Occurrence counts only; the page numbers themselves are never used
+        self.potential_headers = Counter()
+        self.potential_footers = Counter()
         self.confirmed_headers = set()
         self.confirmed_footers = set()
+        self._norm_headers = set()
+        self._norm_footers = set()
+        # Per-instance memo: span texts repeat heavily across pages
+        self._hf_check = lru_cache(maxsize=4096)(self._check_header_or_footer)
     
-    def add_page_text(self, page_spans: List[Dict], page_num: int, page_height: float):
+    def add_page_text(self, page_spans: List[Span], page_num: int, page_height: float):
         top_threshold = page_height * 0.1
         bottom_threshold = page_height * 0.9
         
         for span in page_spans:
-            y_center = (span['bbox'][1] + span['bbox'][3]) / 2
-            text = span['text'].strip()
+            y_center = (span.bbox[1] + span.bbox[3]) / 2
+            text = span.text.strip()
             if len(text) > 100:
                 continue
                 
             if y_center <= top_threshold:
-                self.potential_headers[text].append(page_num)
+                self.potential_headers[text] += 1
             elif y_center >= bottom_threshold:
-                self.potential_footers[text].append(page_num)
+                self.potential_footers[text] += 1
     
     def analyze_repeating_elements(self, total_pages: int):
         min_repetitions = max(2, total_pages // 3)
         
-        for text, page_nums in self.potential_headers.items():
-            if len(page_nums) >= min_repetitions:
+        for text, count in self.potential_headers.items():
+            if count >= min_repetitions:
                 self.confirmed_headers.add(text)
         
-        for text, page_nums in self.potential_footers.items():
-            if len(page_nums) >= min_repetitions:
+        for text, count in self.potential_footers.items():
+            if count >= min_repetitions:
+                self.confirmed_footers.add(text)
+            elif count >= 2 and _FOOTER_UNION.search(text.lower()):
                 self.confirmed_footers.add(text)
         
-        footer_patterns = [
-            r'page \d+',
-            r'\d+ of \d+',
-            r'©',
-            r'copyright',
-            r'version \d+',
-            r'\d{4}',
-        ]
-        
-        for text, page_nums in self.potential_footers.items():
-            text_lower = text.lower()
-            for pattern in footer_patterns:
-                if re.search(pattern, text_lower) and len(page_nums) >= 2:
-                    self.confirmed_footers.add(text)
-                    break
+        # Digit-insensitive keys so page-numbered variants match in O(1)
+        self._norm_headers = {key for key in map(self._similarity_key, self.confirmed_headers) if len(key) > 3}
+        self._norm_footers = {key for key in map(self._similarity_key, self.confirmed_footers) if len(key) > 3}
+        self._hf_check.cache_clear()
     
     def is_header_or_footer(self, text: str) -> bool:
-        text = text.strip()
+        return self._hf_check(text.strip())
+    
+    def _check_header_or_footer(self, text: str) -> bool:
         if text in self.confirmed_headers or text in self.confirmed_footers:
             return True
-        for header_text in self.confirmed_headers:
-            if self._is_similar_text(text, header_text):
-                return True
-        for footer_text in self.confirmed_footers:
-            if self._is_similar_text(text, footer_text):
-                return True
-        
+        # Same key as _similarity_key; subn also reports whether text has digits
         text_lower = text.lower()
-        common_patterns = [
-            r'page \d+',
-            r'\d+ of \d+',
-            r'chapter \d+',
-            r'section \d+',
-            r'©.*\d{4}',
-            r'copyright.*\d{4}',
-            r'version \d+',
-            r'^[.\s]+$',
-        ]
-        
-        for pattern in common_patterns:
-            if re.search(pattern, text_lower):
-                return True
+        norm, digit_runs = _DIGIT_RE.subn('X', text_lower)
+        if norm in self._norm_headers or norm in self._norm_footers:
+            return True
         
-        return False
+        if digit_runs:
+            return bool(_HEADER_FOOTER_UNION.search(text_lower))
+        return bool(_DOTS_ONLY_RE.match(text_lower))
     
-    def _is_similar_text(self, text1: str, text2: str) -> bool:
-        normalized1 = re.sub(r'\d+', 'X', text1.lower().strip())
-        normalized2 = re.sub(r'\d+', 'X', text2.lower().strip())
-        return normalized1 == normalized2 and len(normalized1) > 3
+    @staticmethod
+    def _similarity_key(text: str) -> str:
+        return _DIGIT_RE.sub('X', text.lower().strip())
 
 class SimplePDFOutlineExtractor:
     def __init__(self, debug_mode=False):
@@ -109,72 +195,53 @@ class SimplePDFOutlineExtractor:
             outline.append({"level": heading_level, "text": title.strip(), "page": page})
         return outline
 
-    def is_text_visible_and_valid(self, span: Dict, page_text: str, page_num: int) -> Tuple[bool, str]:
-        """Enhanced filtering with detailed rejection reasons."""
-        text = span["text"].strip()
-        rejection_reason = ""
-        
+    @staticmethod
+    def _geometry_rejection(font_size: float, bbox: Tuple, color: float) -> str:
+        """Cheap numeric visibility checks; returns a rejection reason or ''."""
         # Check if text is too small (likely hidden)
-        if span.get("font_size", 0) < 4:  # Increased from 3 to 4
-            rejection_reason = f"Font size too small: {span.get('font_size', 0)}"
-            return False, rejection_reason
+        if font_size < 4:  # Increased from 3 to 4
+            return f"Font size too small: {font_size}"
         
         # Check if text is outside reasonable page bounds
-        bbox = span.get("bbox", (0, 0, 0, 0))
         if bbox[0] < 0 or bbox[1] < 0:  # Negative coordinates
-            rejection_reason = f"Negative coordinates: {bbox}"
-            return False, rejection_reason
+            return f"Negative coordinates: {bbox}"
         if bbox[2] - bbox[0] < 5 or bbox[3] - bbox[1] < 3:  # Too small dimensions
-            rejection_reason = f"Too small dimensions: {bbox}"
-            return False, rejection_reason
+            return f"Too small dimensions: {bbox}"
         
         # Check for very light/transparent text (often hidden)
-        if span.get("color", 0) > 0.95:  # Very light color (close to white)
-            rejection_reason = f"Very light text color: {span.get('color', 0)}"
-            return False, rejection_reason
-        
-        # More strict validation against page text
-        normalized_text = re.sub(r'\s+', ' ', text.lower().strip())
-        normalized_page_text = re.sub(r'\s+', ' ', page_text.lower())
+        if color > 0.95:  # Very light color (close to white)
+            return f"Very light text color: {color}"
         
-        # If the text is longer than 10 characters and not found in page text, it's suspicious
-        if len(normalized_text) > 10:
-            if normalized_text not in normalized_page_text:
-                # Check if most words from the text appear
-                words = [w for w in normalized_text.split() if len(w) > 2]
-                if words:
-                    found_words = sum(1 for word in words if word in normalized_page_text)
-                    word_match_ratio = found_words / len(words)
-                    if word_match_ratio < 0.7:  # Increased threshold from 0.5 to 0.7
-                        rejection_reason = f"Low word match ratio: {word_match_ratio:.2f} for text: '{text[:50]}...'"
-                        return False, rejection_reason
+        return ""
+
+    def is_text_visible_and_valid(self, span: Span, page_num: int) -> Tuple[bool, str]:
+        """Enhanced filtering with detailed rejection reasons.
+
+        Covers the text checks only; callers run _geometry_rejection first.
+        """
+        text = span.text.strip()
         
         # Check for suspicious patterns that indicate hidden/generated text
-        suspicious_patterns = [
-            (r'^[a-zA-Z]\s[a-zA-Z]\s[a-zA-Z]', "Single letters with spaces"),
-            (r'^\s*[^\w\s]*\s*$', "Only special characters"),
-            (r'^.{1,2}$', "Very short text (1-2 characters)"),
-            (r'^[A-Z]{2,}\s*$', "All caps short text"),  # New pattern
-            (r'^\d+\s*$', "Numbers only"),  # New pattern
-        ]
-        
-        for pattern, description in suspicious_patterns:
-            if re.match(pattern, text):
-                rejection_reason = f"Suspicious pattern ({description}): '{text}'"
-                return False, rejection_reason
+        match = _SUSPICIOUS_UNION.match(text)
+        if match:
+            rejection_reason = f"Suspicious pattern ({_SUSPICIOUS_DESCS[match.lastgroup]}): '{text}'"
+            return False, rejection_reason
         
         return True, ""
 
     def extract_spans_with_metadata(self, page):
         spans = []
-        data = page.get_text("dict")
+        # Plain-text flags: image blocks are never used, so don't decode them
+        data = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
         page_height = page.rect.height
         page_num = page.number + 1
         
-        # Get plain text for comparison
-        plain_text = page.get_text()
-        
         if self.debug_mode:
+            plain_text = "\n".join(
+                "".join(span.get("text", "") for span in line.get("spans", []))
+                for block in data.get("blocks", []) if "lines" in block
+                for line in block["lines"]
+            )
             print(f"\n--- DEBUG: Processing Page {page_num} ---")
             print(f"Plain text preview: {plain_text[:200]}...")
         
@@ -187,104 +254,118 @@ class SimplePDFOutlineExtractor:
                     if not text or len(text) < 2:
                         continue
                     
-                    span_data = {
-                        "text": text,
-                        "font_size": span.get("size", 0),
-                        "page": page_num,
-                        "bbox": span.get("bbox", (0, 0, 0, 0)),
-                        "font": span.get("font", ""),
-                        "flags": span.get("flags", 0),
-                        "color": span.get("color", 0),
-                        "page_height": page_height
-                    }
+                    # Numeric checks run once, before the span record is built;
+                    # outside debug mode rejected spans are dropped right away.
+                    rejection_reason = self._geometry_rejection(
+                        span.get("size", 0), span.get("bbox", (0, 0, 0, 0)), span.get("color", 0)
+                    )
+                    if rejection_reason and not self.debug_mode:
+                        continue
+                    
+                    span_data = Span(
+                        text=text,
+                        font_size=span.get("size", 0),
+                        page=page_num,
+                        bbox=span.get("bbox", (0, 0, 0, 0)),
+                        font=span.get("font", ""),
+                        flags=span.get("flags", 0),
+                        color=span.get("color", 0),
+                        page_height=page_height,
+                    )
                     
                     if self.debug_mode:
                         self.debug_info['all_spans'].append(span_data.copy())
                     
                     # Apply enhanced filtering
-                    is_valid, rejection_reason = self.is_text_visible_and_valid(span_data, plain_text, page_num)
+                    is_valid = not rejection_reason
+                    if is_valid:
+                        is_valid, rejection_reason = self.is_text_visible_and_valid(span_data, page_num)
                     if is_valid:
                         spans.append(span_data)
                         if self.debug_mode:
                             self.debug_info['filtered_spans'].append(span_data.copy())
                     else:
                         if self.debug_mode:
-                            span_data['rejection_reason'] = rejection_reason
+                            span_data.rejection_reason = rejection_reason
                             self.debug_info['rejected_spans'].append(span_data.copy())
         
         return spans
 
+    def extract_all_pages(self, doc, input_path: str) -> List[Tuple[List[Span], int, float]]:
+        """Extract spans for every page, in page order.
+
+        Large documents are split across worker processes; debug mode stays
+        serial so debug_info is collected in this process.
+        """
+        max_workers = min(os.cpu_count() or 1, -(-len(doc) // PAGE_CHUNK_SIZE))
+        if self.debug_mode or len(doc) < PARALLEL_MIN_PAGES or max_workers <= 1:
+            return [
+                (self.extract_spans_with_metadata(page), page.number + 1, page.rect.height)
+                for page in doc
+            ]
+        # Documents aren't picklable, so each worker opens its own copy
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_page_worker,
+                                 initargs=(input_path,)) as executor:
+            return list(executor.map(_extract_page, range(len(doc)), chunksize=PAGE_CHUNK_SIZE))
+
     def normalize_text(self, text: str) -> str:
-        return ' '.join(text.split())
+        return _normalize_text(text)
 
-    def is_likely_heading(self, span: Dict) -> bool:
-        text = span["text"].strip()
-        if len(text) < 3 or len(text) > 150 or text.count('.') > 10:
-            return False
-        if self.header_footer_detector.is_header_or_footer(text):
-            return False
-        
-        # Enhanced skip patterns
-        skip_patterns = [
-            r'^\d+$',
-            r'^[.\s]+$',
-            r'www\.',
-            r'http',
-            r'@',
-            r'^[^a-zA-Z]*$',  # Only non-alphabetic characters
-            r'^\w{1,2}$',     # Very short words
-            r'^[A-Z]\s*$',    # Single capital letter
-        ]
-        for pattern in skip_patterns:
-            if re.search(pattern, text.lower()):
-                return False
-        return True
-
-    def assign_levels_by_font_size(self, spans: List[Dict], title_text: str = "") -> Dict[str, List[Dict]]:
-        filtered_spans = [span for span in spans if self.is_likely_heading(span)]
-        if not filtered_spans:
-            return {'Title': [], 'H1': [], 'H2': [], 'H3': []}
+    def is_likely_heading(self, span: Span) -> bool:
+        text = span.text.strip()
+        # Cheap cached heuristics first so rejected text never reaches the detector
+        return _likely_heading_text(text) and not self.header_footer_detector.is_header_or_footer(text)
+
+    def collect_heading_candidates(self, spans: List[Span]) -> Tuple[List[Tuple[Span, str]], Counter, Optional[Span]]:
+        """Single pass over all spans: set original_order, classify headings,
+        count heading font sizes and track the largest page-1 heading.
+
+        Returns (candidates, size_counts, largest_page1) where candidates are
+        (span, normalized_text) pairs in document order.
+        """
+        candidates = []
+        size_counts = Counter()
+        largest = None
+        for i, span in enumerate(spans):
+            span.original_order = i
+            if not self.is_likely_heading(span):
+                continue
+            candidates.append((span, self.normalize_text(span.text)))
+            size_counts[span.font_size] += 1
+            if span.page == 1 and (largest is None or span.font_size > largest.font_size):
+                largest = span
+        return candidates, size_counts, largest
 
+    def assign_levels_by_font_size(self, candidates: List[Tuple[Span, str]], size_counts: Counter,
+                                   title_text: str = "") -> Dict[str, List[Span]]:
+        """Assign H1-H3 to candidates from collect_heading_candidates."""
         # Remove title text from heading assignment
         if title_text:
-            filtered_spans = [span for span in filtered_spans if self.normalize_text(span['text']) != title_text]
+            size_counts = size_counts.copy()
+            size_counts.subtract(span.font_size for span, normalized_text in candidates if normalized_text == title_text)
 
-        if not filtered_spans:
-            return {'Title': [], 'H1': [], 'H2': [], 'H3': []}
-
-        font_sizes = sorted(set(span['font_size'] for span in filtered_spans), reverse=True)
-        level_map = {}
-        
-        # Now assign H1, H2, H3 to the remaining font sizes (after excluding title)
-        if len(font_sizes) > 0:
-            level_map[font_sizes[0]] = 'H1'
-        if len(font_sizes) > 1:
-            level_map[font_sizes[1]] = 'H2'
-        if len(font_sizes) > 2:
-            level_map[font_sizes[2]] = 'H3'
+        # Now assign H1, H2, H3 to the largest remaining font sizes (after excluding title)
+        remaining_sizes = [size for size, count in size_counts.items() if count > 0]
+        level_map = dict(zip(heapq.nlargest(3, remaining_sizes), ('H1', 'H2', 'H3')))
 
         levels = {'Title': [], 'H1': [], 'H2': [], 'H3': []}
         seen_texts = set()
-        for span in filtered_spans:
-            level = level_map.get(span['font_size'])
-            if not level:
+        for span, normalized_text in candidates:
+            level = level_map.get(span.font_size)
+            if not level or (title_text and normalized_text == title_text):
                 continue
-            normalized_text = self.normalize_text(span['text'])
             if normalized_text and normalized_text not in seen_texts:
                 seen_texts.add(normalized_text)
                 span_copy = span.copy()
-                span_copy['text'] = normalized_text
+                span_copy.text = normalized_text
                 levels[level].append(span_copy)
         return levels
 
     def group_headings_by_page(self, outline: List[Dict]) -> Dict[int, List[Dict]]:
-        page_headings = defaultdict(list)
-        for heading in outline:
-            page_num = heading['page']
-            page_headings[page_num].append(heading)
-        for page_num in page_headings:
-            page_headings[page_num].sort(key=lambda x: x.get('original_order', 0))
-        return dict(page_headings)
+        # One sort by (page, original_order), then group consecutive pages;
+        # the sort is stable so headings without an order keep their position
+        ordered = sorted(outline, key=lambda x: (x['page'], x.get('original_order', 0)))
+        return {page_num: list(headings) for page_num, headings in groupby(ordered, key=itemgetter('page'))}
 
     def print_debug_info(self):
         """Print detailed debug information about text extraction."""
@@ -298,12 +379,12 @@ class SimplePDFOutlineExtractor:
         
         print(f"\n--- REJECTED SPANS ---")
         for span in self.debug_info['rejected_spans']:
-            print(f"Page {span['page']}: '{span['text'][:50]}...' - {span.get('rejection_reason', 'Unknown')}")
+            print(f"Page {span.page}: '{span.text[:50]}...' - {span.rejection_reason or 'Unknown'}")
         
         print(f"\n--- VALID SPANS (potential headings) ---")
         for span in self.debug_info['filtered_spans']:
-            if len(span['text']) > 10 and span['font_size'] > 10:  # Likely headings
-                print(f"Page {span['page']}: '{span['text']}' (Font: {span['font_size']}, Bbox: {span['bbox']})")
+            if len(span.text) > 10 and span.font_size > 10:  # Likely headings
+                print(f"Page {span.page}: '{span.text}' (Font: {span.font_size}, Bbox: {span.bbox})")
 
     def process_pdf_simple(self, input_path: str, output_path: str):
         doc = fitz.open(input_path)
@@ -314,27 +395,24 @@ class SimplePDFOutlineExtractor:
         builtin_toc = self.extract_builtin_toc(doc)
         if builtin_toc:
             title = os.path.splitext(os.path.basename(input_path))[0]
-            simple_outline = [{"level": h["level"], "text": h["text"], "page": h["page"]} for h in builtin_toc]
             result = {
                 "title": title,
-                "outline": simple_outline
+                "outline": builtin_toc
             }
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            write_json(result, output_path)
             print(f"Outline written to {output_path}")
             print(f"Title: {title}")
             print(f"Found {len(builtin_toc)} headings using built-in TOC")
             print("\nComplete Outline:")
-            for heading in simple_outline:
+            for heading in builtin_toc:
                 print(f"  {heading['level']}: {heading['text']} (Page {heading['page']})")
             doc.close()
             return
 
         all_spans = []
-        for page in doc:
-            spans = self.extract_spans_with_metadata(page)
+        for spans, page_num, page_height in self.extract_all_pages(doc, input_path):
             all_spans.extend(spans)
-            self.header_footer_detector.add_page_text(spans, page.number + 1, page.rect.height)
+            self.header_footer_detector.add_page_text(spans, page_num, page_height)
 
         self.header_footer_detector.analyze_repeating_elements(len(doc))
         
@@ -346,64 +424,72 @@ class SimplePDFOutlineExtractor:
             doc.close()
             return
 
-        for i, span in enumerate(all_spans):
-            span['original_order'] = i
+        # Classify each span once (header/footer analysis is complete by now)
+        candidates, size_counts, largest = self.collect_heading_candidates(all_spans)
 
         # First, determine the title
-        title = ""
-        page1_spans = [s for s in all_spans if s['page'] == 1 and self.is_likely_heading(s)]
-        if page1_spans:
-            largest = max(page1_spans, key=lambda s: s['font_size'])
-            title = self.normalize_text(largest['text'])
+        title = self.normalize_text(largest.text) if largest else ""
         if not title:
             title = os.path.splitext(os.path.basename(input_path))[0]
 
         # Then assign levels, excluding the title text
-        level_groups = self.assign_levels_by_font_size(all_spans, title)
-        outline = []
-        for level in ['H1', 'H2', 'H3']:
-            for span in level_groups[level]:
-                outline.append({
-                    "level": level,
-                    "text": span['text'],
-                    "page": span['page'],
-                    "font_size": span['font_size'],
-                    "original_order": span['original_order']
-                })
-        outline.sort(key=lambda x: x['original_order'])
-        
-        # Create simple outline format
-        simple_outline = [{"level": h["level"], "text": h["text"], "page": h["page"]} for h in outline]
+        level_groups = self.assign_levels_by_font_size(candidates, size_counts, title)
+        # Each level list is already in document order, so a linear merge suffices
+        headings = heapq.merge(
+            *(zip(repeat(level), level_groups[level]) for level in ['H1', 'H2', 'H3']),
+            key=lambda item: item[1].original_order
+        )
+        # Emit the outline directly in its output format
+        outline = [{"level": level, "text": span.text, "page": span.page} for level, span in headings]
 
         result = {
             "title": title,
-            "outline": simple_outline
+            "outline": outline
         }
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        write_json(result, output_path)
 
         print(f"Outline written to {output_path}")
         print(f"Title: {title}")
         print(f"Found {len(outline)} headings using font size analysis")
         print("\nComplete Outline:")
-        for heading in simple_outline:
+        for heading in outline:
             print(f"  {heading['level']}: {heading['text']} (Page {heading['page']})")
 
         # Debug: Show what text was filtered out
         print(f"\nSummary:")
-        print(f"- Total spans found before filtering: {len([s for s in all_spans if len(s['text'].strip()) > 2])}")
+        print(f"- Total spans found before filtering: {len([s for s in all_spans if len(s.text.strip()) > 2])}")
         print(f"- Headings found after filtering: {len(outline)}")
         print(f"- Pages processed: {len(doc)}")
 
         doc.close()
 
+def write_json(result: Dict, output_path: str):
+    """Write result as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+_worker_doc = None
+_worker_extractor = None
+
+def _init_page_worker(pdf_path: str):
+    global _worker_doc, _worker_extractor
+    _worker_doc = fitz.open(pdf_path)
+    _worker_extractor = SimplePDFOutlineExtractor()
+
+def _extract_page(page_index: int) -> Tuple[List[Span], int, float]:
+    page = _worker_doc[page_index]
+    return _worker_extractor.extract_spans_with_metadata(page), page.number + 1, page.rect.height
+
 def main():
     print("=== Enhanced PDF Outline Extractor with Advanced Filtering & Debug ===")
     print("Features:")
     print("- Advanced filtering of hidden/invisible text")
     print("- Removal of PDF artifacts and suspicious text")
-    print("- Cross-validation with plain text extraction")
     print("- Built-in TOC support with fallback to font analysis")
     print("- Debug mode for troubleshooting")
     print()